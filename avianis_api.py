@@ -1,3 +1,4 @@
+import orjson
 import requests
 import logging
 import threading
@@ -128,7 +129,7 @@ class AvianisAPIClient:
             response = self.session.get(url, params=params, timeout=timeout)
 
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 logging.info(f"API request successful: {url} returned {len(data) if isinstance(data, list) else 'non-list'} records")
                 return data
             elif response.status_code == 401:
@@ -136,7 +137,7 @@ class AvianisAPIClient:
                 if self.authenticate():
                     response = self.session.get(url, params=params, timeout=timeout)
                     if response.status_code == 200:
-                        data = response.json()
+                        data = orjson.loads(response.content)
                         logging.info(f"API request successful after re-auth: {url} returned {len(data) if isinstance(data, list) else 'non-list'} records")
                         return data
 
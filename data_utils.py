@@ -1,7 +1,8 @@
-from datetime import datetime, timedelta
-from typing import Tuple, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Tuple, Optional, List
 import logging
 import hashlib
+import pandas as pd
 
 def format_iso_datetime(dt: datetime) -> str:
     """
@@ -16,8 +17,8 @@ def format_date_only(dt: datetime) -> str:
     return dt.strftime('%Y-%m-%d')
 
 def get_utc_now() -> datetime:
-    """Get current UTC datetime"""
-    return datetime.utcnow()
+    """Get current UTC datetime (naive, matching the DATETIME columns)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 class DateRangeManager:
     """Manages date ranges for initial and incremental loads"""
@@ -141,6 +142,24 @@ def parse_iso_datetime(iso_string: str) -> Optional[datetime]:
         logging.error(f"Error parsing datetime {iso_string}: {e}")
         return None
 
+def parse_iso_datetime_series(values: List[Optional[str]]) -> pd.Series:
+    """Parse a batch of ISO datetime strings in a single vectorized pass
+
+    Returns naive UTC timestamps; missing or unparseable values become NaT
+    """
+    raw = pd.Series(values, dtype=object)
+    parsed = pd.to_datetime(raw, utc=True, errors='coerce', format='ISO8601').dt.tz_localize(None)
+
+    unparsed_count = int((raw.notna() & parsed.isna()).sum())
+    if unparsed_count:
+        logging.warning(f"Could not parse {unparsed_count} datetime values")
+
+    return parsed
+
+def series_to_list(series: pd.Series) -> list:
+    """Convert a Series to a list of Python values, using None for missing entries"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
 def parse_flight_datetime(date_string: str) -> Optional[datetime]:
     """Parse flight data datetime format like '8/4/2025 8:41:02 PM' to UTC datetime"""
     if not date_string:
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config import Config
@@ -28,6 +29,19 @@ class DatabaseManager:
         """Get database session"""
         return self.SessionLocal()
     
+    @contextmanager
+    def session_scope(self):
+        """Provide a session that commits on success, rolls back on error and is always closed"""
+        session = self.SessionLocal()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def close_connection(self):
         """Close database connection"""
         self.engine.dispose()
\ No newline at end of file
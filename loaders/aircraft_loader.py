@@ -4,8 +4,7 @@ from database import DatabaseManager
 import logging
 import zlib
 from typing import Dict, List, Optional
-from data_utils import safe_get, clean_string, safe_int
-from datetime import datetime
+from data_utils import safe_get, clean_string, safe_int, get_utc_now
 from .airport_loader import AirportLoader
 from transformers.aircraft_category_transformer import AircraftCategoryTransformer
 
@@ -67,6 +66,7 @@ class AircraftLoader:
             
             # Transform category data with auto-increment IDs
             transformed_records = []
+            create_time = get_utc_now()
             for category, category_id, mean_capacity in sorted_categories:
                 category_name = clean_string(safe_get(category, 'name'))
                 
@@ -78,7 +78,7 @@ class AircraftLoader:
                     'name': category_name,
                     'code': category_name,  # Use name as code since no code provided
                     'fmsid': safe_get(category, 'id'),  # Store original Avianis ID
-                    'createtime': datetime.utcnow()
+                    'createtime': create_time
                 }
                 transformed_records.append(record)
             
@@ -110,6 +110,7 @@ class AircraftLoader:
             
             # Transform model data
             transformed_records = []
+            create_time = get_utc_now()
             for model in model_data:
                 type_id = self.generate_stable_id(safe_get(model, 'id'))
                 type_name = clean_string(safe_get(model, 'name'))
@@ -123,7 +124,7 @@ class AircraftLoader:
                     'description': f"{clean_string(safe_get(model, 'manufacturer'))} {type_name}",
                     'code': clean_string(safe_get(model, 'code')),
                     'fmsid': safe_get(model, 'id'),  # Store original Avianis ID
-                    'createtime': datetime.utcnow(),
+                    'createtime': create_time,
                     # aircraftcategoryid will be set when we have the relationship data
                 }
                 transformed_records.append(record)
@@ -216,6 +217,7 @@ class AircraftLoader:
             
             # Transform aircraft data
             transformed_records = []
+            create_time = get_utc_now()
             for aircraft in aircraft_data:
                 aircraft_id = self.generate_stable_id(safe_get(aircraft, 'id'))
                 aircraft_type_name = clean_string(safe_get(aircraft, 'aircraftType'))
@@ -242,7 +244,7 @@ class AircraftLoader:
                     'baseairportid': baseairportid,
                     'isactive': 1 if safe_get(aircraft, 'active') else 0,
                     'fmsid': safe_get(aircraft, 'id'),  # Store original Avianis ID
-                    'createtime': datetime.utcnow(),
+                    'createtime': create_time,
                     # doc, isonep, istwop not available in Avianis response
                 }
                 transformed_records.append(record)
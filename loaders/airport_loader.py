@@ -83,7 +83,7 @@ class AirportLoader:
                 code_upper = airport_code.upper()
                 if code_upper in airport_dict:
                     airport_mapping[airport_code] = airport_dict[code_upper]
-                    logging.debug(f"Airport found in dictionary: {airport_code} -> ID {airport_dict[code_upper]}")
+                    logging.debug("Airport found in dictionary: %s -> ID %s", airport_code, airport_mapping[airport_code])
                 else:
                     missing_airports.append(airport_code)
                     logging.warning(f"Airport not found in dictionary: '{airport_code}'")
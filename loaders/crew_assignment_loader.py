@@ -30,12 +30,13 @@ class CrewAssignmentLoader:
             session.close()
             
             # Load data (let MySQL auto-increment the id field)
+            # Default method uses the driver's executemany in bounded chunks
             crew_assignment_df.to_sql(
                 'crewassignment_temp',
                 con=self.db_manager.engine,
                 if_exists='append',
                 index=False,
-                method='multi'
+                chunksize=5000
             )
             
             logging.info(f"Successfully loaded {len(crew_assignment_df)} crew assignment records into crewassignment_temp table")
@@ -48,7 +49,6 @@ class CrewAssignmentLoader:
     def transfer_temp_to_target(self, query_date_range: tuple) -> int:
         """Transfer crew assignments from temp table to target table with shift aggregation and dutydate calculation"""
         try:
-            from sqlalchemy import text
             session = self.db_manager.get_session()
             
             min_date, max_date = query_date_range
@@ -3,7 +3,7 @@ from sqlalchemy import text
 from database import DatabaseManager
 import logging
 from typing import Optional, Dict, List
-from data_utils import safe_get, clean_string, parse_iso_datetime
+from data_utils import safe_get, clean_string, parse_iso_datetime, get_utc_now
 from datetime import datetime
 
 class CrewEventsLoader:
@@ -60,13 +60,13 @@ class CrewEventsLoader:
 
         transformed_records = []
         filtered_count = 0
+        batch_create_time = get_utc_now()
 
         for event in events_data:
             # Only process events that should mark crew unavailable
             if not self.should_mark_unavailable(event):
-                event_type = safe_get(event, 'eventType', '')
-                duty_category = safe_get(event, 'dutyEventCategory', '')
-                logging.debug(f"Filtered out event {safe_get(event, 'id')} - eventType: '{event_type}', dutyEventCategory: '{duty_category}'")
+                logging.debug("Filtered out event %s - eventType: '%s', dutyEventCategory: '%s'",
+                              safe_get(event, 'id'), safe_get(event, 'eventType', ''), safe_get(event, 'dutyEventCategory', ''))
                 filtered_count += 1
                 continue
 
@@ -89,7 +89,7 @@ class CrewEventsLoader:
                 continue
 
             last_updated = parse_iso_datetime(safe_get(event, 'lastUpdatedDate'))
-            create_time = last_updated if last_updated else datetime.utcnow()
+            create_time = last_updated if last_updated else batch_create_time
 
             record = {
                 'fmsid': event_id,
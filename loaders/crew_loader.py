@@ -3,8 +3,7 @@ from sqlalchemy import text
 from database import DatabaseManager
 import logging
 from typing import Optional, Dict, List
-from data_utils import safe_get, clean_string, safe_int, parse_iso_datetime
-from datetime import datetime
+from data_utils import safe_get, clean_string, safe_int, parse_iso_datetime, get_utc_now
 from .airport_loader import AirportLoader
 
 class CrewLoader:
@@ -22,6 +21,7 @@ class CrewLoader:
             return pd.DataFrame()
         
         transformed_records = []
+        create_time = get_utc_now()
         
         for person in personnel_data:
             first_name = clean_string(safe_get(person, 'firstName'))
@@ -41,7 +41,7 @@ class CrewLoader:
                 'issenior': 0,  # Default to non-senior, could be derived from position/seniority
                 'isdomesticonly': 0,  # Default to not domestic only
                 'fmsid': safe_get(person, 'id'),  # Store original Avianis ID
-                'createtime': datetime.utcnow(),
+                'createtime': create_time,
                 'updatedby': 'avianis_etl'
             }
             
@@ -72,7 +72,7 @@ class CrewLoader:
                 return False
             
             # Calculate age
-            today = datetime.utcnow()
+            today = get_utc_now()
             age = today.year - birth_date.year
             
             # Adjust for birthday not yet passed this year
@@ -125,13 +125,14 @@ class CrewLoader:
             return pd.DataFrame()
         
         transformed_records = []
+        create_time = get_utc_now()
         
         for duty in duty_data:
             record = {
                 'code': clean_string(safe_get(duty, 'code')) or clean_string(safe_get(duty, 'name')),
                 'description': clean_string(safe_get(duty, 'description')) or clean_string(safe_get(duty, 'name')),
                 'isavailable': True,  # Default to available
-                'createtime': datetime.utcnow(),
+                'createtime': create_time,
                 'updatedby': 'avianis_etl'
             }
             
@@ -187,6 +188,7 @@ class CrewLoader:
 
             # Transform data
             transformed_records = []
+            create_time = get_utc_now()
 
             for person in personnel_data:
                 first_name = clean_string(safe_get(person, 'firstName'))
@@ -207,7 +209,7 @@ class CrewLoader:
                 baseairportid = None
                 if homebase_airport and homebase_airport in airport_mapping:
                     baseairportid = airport_mapping[homebase_airport]
-                    logging.debug(f"Mapped airport {homebase_airport} to ID {baseairportid} for person {safe_get(person, 'id')}")
+                    logging.debug("Mapped airport %s to ID %s for person %s", homebase_airport, baseairportid, safe_get(person, 'id'))
 
                 if not baseairportid and homebase_airport:
                     logging.warning(f"No airport mapping found for person {safe_get(person, 'id')}: homebaseAirport='{homebase_airport}'")
@@ -226,7 +228,7 @@ class CrewLoader:
                     'issenior': 1 if is_senior else 0,
                     'isdomesticonly': 0,  # Default to not domestic only
                     'fmsid': safe_get(person, 'id'),  # Store original Avianis ID
-                    'createtime': datetime.utcnow(),
+                    'createtime': create_time,
                     'updatedby': 'avianis_etl'
                 }
 
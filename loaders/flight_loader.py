@@ -1,16 +1,132 @@
-import pandas as pd
 from sqlalchemy import text
 from database import DatabaseManager
 import logging
 import concurrent.futures
+from contextlib import contextmanager
 from typing import Optional, Dict, List
 from data_utils import safe_get, clean_string, safe_int, safe_float, parse_iso_datetime, generate_stable_id
 from datetime import datetime, timedelta
 from .airport_loader import AirportLoader
-from transformers.flight_transformer import FlightTransformer
+from transformers.flight_transformer import FlightTransformer, MovementRecord
 from loaders.crew_assignment_loader import CrewAssignmentLoader
 from lookup_service import LookupService
 
+# Upsert data from movement_temp to movement
+_PORT_MOVEMENT_SQL = text("""
+    INSERT INTO movement (
+        id, demandid, fromairportid, toairportid, fromfboid, tofboid, aircraftid,
+        outtime, offtime, ontime, intime, actualouttime, actualofftime,
+        actualontime, actualintime, flighttime, blocktime, status, picid, sicid,
+        fmsversion, fmsid, createtime, pic, sic, fromairport, toairport,
+        tailnumber, isowner, isaclocked, iscrewlocked, isposition, tripnumber, numberpassenger
+    )
+    SELECT
+        id, demandid, fromairportid, toairportid, fromfboid, tofboid, aircraftid,
+        outtime, offtime, ontime, intime, actualouttime, actualofftime,
+        actualontime, actualintime, flighttime, blocktime, status, picid, sicid,
+        fmsversion, fmsid, createtime, pic, sic, fromairport, toairport,
+        tailnumber, isowner, isaclocked, iscrewlocked, isposition, tripnumber, numberpassenger
+    FROM movement_temp AS new
+    ON DUPLICATE KEY UPDATE
+        demandid = new.demandid,
+        fromairportid = new.fromairportid,
+        toairportid = new.toairportid,
+        fromfboid = new.fromfboid,
+        tofboid = new.tofboid,
+        aircraftid = new.aircraftid,
+        outtime = new.outtime,
+        offtime = new.offtime,
+        ontime = new.ontime,
+        intime = new.intime,
+        actualouttime = new.actualouttime,
+        actualofftime = new.actualofftime,
+        actualontime = new.actualontime,
+        actualintime = new.actualintime,
+        flighttime = new.flighttime,
+        blocktime = new.blocktime,
+        status = new.status,
+        picid = new.picid,
+        sicid = new.sicid,
+        fmsversion = new.fmsversion,
+        fmsid = new.fmsid,
+        createtime = new.createtime,
+        pic = new.pic,
+        sic = new.sic,
+        fromairport = new.fromairport,
+        toairport = new.toairport,
+        tailnumber = new.tailnumber,
+        isowner = new.isowner,
+        isaclocked = new.isaclocked,
+        iscrewlocked = new.iscrewlocked,
+        isposition = new.isposition,
+        tripnumber = new.tripnumber,
+        numberpassenger = new.numberpassenger
+""")
+
+# Upsert qualifying flights into demand table from movement_temp
+# Criteria: isEmpty=false (isposition=0)
+_DEMAND_SQL = text("""
+    INSERT INTO demand (
+        id, legnumber, tripnumber, requestaircrafttypeid, requestaircraftcategoryid,
+        fromairportid, toairportid, fromfboid, tofboid, aircraftid, outtime, intime,
+        primarypaxid, numberpassenger, flighttime, blocktime, status, flexbefore, flexafter,
+        isowner, iswholesale, isofffleet, fmsversion, fmsid, createtime
+    )
+    SELECT
+        id,
+        1 as legnumber,
+        tripnumber,
+        NULL as requestaircrafttypeid,
+        NULL as requestaircraftcategoryid,
+        fromairportid,
+        toairportid,
+        fromfboid,
+        tofboid,
+        aircraftid,
+        outtime,
+        intime,
+        NULL as primarypaxid,
+        numberpassenger,
+        flighttime,
+        blocktime,
+        status,
+        0 as flexbefore,
+        0 as flexafter,
+        isowner,
+        0 as iswholesale,
+        0 as isofffleet,
+        fmsversion,
+        tripid as fmsid,
+        createtime
+    FROM movement_temp AS new
+    WHERE isposition = 0
+    ON DUPLICATE KEY UPDATE
+        legnumber = VALUES(legnumber),
+        tripnumber = new.tripnumber,
+        requestaircrafttypeid = VALUES(requestaircrafttypeid),
+        requestaircraftcategoryid = VALUES(requestaircraftcategoryid),
+        fromairportid = new.fromairportid,
+        toairportid = new.toairportid,
+        fromfboid = new.fromfboid,
+        tofboid = new.tofboid,
+        aircraftid = new.aircraftid,
+        outtime = new.outtime,
+        intime = new.intime,
+        primarypaxid = VALUES(primarypaxid),
+        numberpassenger = new.numberpassenger,
+        flighttime = new.flighttime,
+        blocktime = new.blocktime,
+        status = new.status,
+        flexbefore = VALUES(flexbefore),
+        flexafter = VALUES(flexafter),
+        isowner = new.isowner,
+        iswholesale = VALUES(iswholesale),
+        isofffleet = VALUES(isofffleet),
+        fmsversion = new.fmsversion,
+        fmsid = new.tripid,
+        createtime = new.createtime
+""")
+
 class FlightLoader:
     """Handle loading flight schedule data into movement_temp, movement, and demand tables"""
 
@@ -22,8 +138,17 @@ class FlightLoader:
         self.lookup_service = LookupService(db_manager)
         self.api_client = api_client
 
+    @contextmanager
+    def _session(self, session=None):
+        """Yield the caller's session, or a new one that is committed and closed on exit"""
+        if session is not None:
+            yield session
+        else:
+            with self.db_manager.session_scope() as own_session:
+                yield own_session
+
     def _clear_table(self, session, table_name: str, is_initial: bool, start_date: str = None, end_date: str = None, date_column: str = 'outtime'):
-        """Clear table records based on load type
+        """Clear table records based on load type (committed by the caller's session scope)
 
         Args:
             session: Database session
@@ -51,106 +176,50 @@ class FlightLoader:
             })
             deleted_count = delete_result.rowcount
             logging.info(f"Deleted {deleted_count} existing records from {table_name} in date range {start_date} to {end_date}")
-        session.commit()
     
     
-    def load_to_movement_temp(self, movement_records: List[Dict]) -> int:
+    def load_to_movement_temp(self, movement_records: List[MovementRecord], session=None) -> int:
         """Load movement records to movement_temp table
 
-        Note: Always clears entire movement_temp table since it's a staging table
+        Note: Always clears entire movement_temp table since it's a staging table.
+        If a session is given, the caller owns its transaction.
         """
+        if not movement_records:
+            logging.info("No movement records to load")
+            return 0
+
         try:
-            if not movement_records:
-                logging.info("No movement records to load")
-                return 0
+            with self._session(session) as session:
+                # Clear movement_temp table (always truncate staging table)
+                session.execute(text("TRUNCATE TABLE movement_temp"))
 
-            # Clear movement_temp table (always truncate staging table)
-            session = self.db_manager.get_session()
-            session.execute(text("TRUNCATE TABLE movement_temp"))
-            session.commit()
-            session.close()
-
-            # Convert to DataFrame and load
-            df = pd.DataFrame(movement_records)
-
-            # Load data into movement_temp (let MySQL auto-increment the id field)
-            df.to_sql(
-                'movement_temp',
-                con=self.db_manager.engine,
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
+                # Insert the record tuples positionally (let MySQL auto-increment the id field);
+                # executemany lets the driver batch rows into multi-row INSERTs
+                columns = MovementRecord._fields
+                insert_sql = f"""
+                    INSERT INTO movement_temp ({', '.join(columns)})
+                    VALUES ({', '.join(['%s'] * len(columns))})
+                """
+                connection = session.connection()
+                for start in range(0, len(movement_records), 5000):
+                    connection.exec_driver_sql(insert_sql, movement_records[start:start + 5000])
 
-            logging.info(f"Successfully loaded {len(df)} movement records into movement_temp table")
-            return len(df)
+            logging.info(f"Successfully loaded {len(movement_records)} movement records into movement_temp table")
+            return len(movement_records)
 
         except Exception as e:
             logging.error(f"Error loading flight data to movement_temp: {e}")
             raise
     
-    def port_movement_temp_to_movement(self, is_initial: bool, start_date: str = None, end_date: str = None) -> int:
+    def port_movement_temp_to_movement(self, is_initial: bool, start_date: str = None, end_date: str = None, session=None) -> int:
         """Port data from movement_temp to movement table"""
         try:
-            session = self.db_manager.get_session()
+            with self._session(session) as session:
+                # Clear the movement table based on load type
+                self._clear_table(session, 'movement', is_initial, start_date, end_date, 'outtime')
 
-            # Clear the movement table based on load type
-            self._clear_table(session, 'movement', is_initial, start_date, end_date, 'outtime')
-
-            # Upsert data from movement_temp to movement
-            copy_query = text("""
-                INSERT INTO movement (
-                    id, demandid, fromairportid, toairportid, fromfboid, tofboid, aircraftid,
-                    outtime, offtime, ontime, intime, actualouttime, actualofftime,
-                    actualontime, actualintime, flighttime, blocktime, status, picid, sicid,
-                    fmsversion, fmsid, createtime, pic, sic, fromairport, toairport,
-                    tailnumber, isowner, isaclocked, iscrewlocked, isposition, tripnumber, numberpassenger
-                )
-                SELECT
-                    id, demandid, fromairportid, toairportid, fromfboid, tofboid, aircraftid,
-                    outtime, offtime, ontime, intime, actualouttime, actualofftime,
-                    actualontime, actualintime, flighttime, blocktime, status, picid, sicid,
-                    fmsversion, fmsid, createtime, pic, sic, fromairport, toairport,
-                    tailnumber, isowner, isaclocked, iscrewlocked, isposition, tripnumber, numberpassenger
-                FROM movement_temp AS new
-                ON DUPLICATE KEY UPDATE
-                    demandid = new.demandid,
-                    fromairportid = new.fromairportid,
-                    toairportid = new.toairportid,
-                    fromfboid = new.fromfboid,
-                    tofboid = new.tofboid,
-                    aircraftid = new.aircraftid,
-                    outtime = new.outtime,
-                    offtime = new.offtime,
-                    ontime = new.ontime,
-                    intime = new.intime,
-                    actualouttime = new.actualouttime,
-                    actualofftime = new.actualofftime,
-                    actualontime = new.actualontime,
-                    actualintime = new.actualintime,
-                    flighttime = new.flighttime,
-                    blocktime = new.blocktime,
-                    status = new.status,
-                    picid = new.picid,
-                    sicid = new.sicid,
-                    fmsversion = new.fmsversion,
-                    fmsid = new.fmsid,
-                    createtime = new.createtime,
-                    pic = new.pic,
-                    sic = new.sic,
-                    fromairport = new.fromairport,
-                    toairport = new.toairport,
-                    tailnumber = new.tailnumber,
-                    isowner = new.isowner,
-                    isaclocked = new.isaclocked,
-                    iscrewlocked = new.iscrewlocked,
-                    isposition = new.isposition,
-                    tripnumber = new.tripnumber,
-                    numberpassenger = new.numberpassenger
-            """)
-
-            result = session.execute(copy_query)
-            session.commit()
+                # Upsert data from movement_temp to movement
+                result = session.execute(_PORT_MOVEMENT_SQL)
 
             rows_affected = result.rowcount
             logging.info(f"Successfully ported records from movement_temp to movement: {rows_affected} rows affected (inserted or updated)")
@@ -159,85 +228,18 @@ class FlightLoader:
 
         except Exception as e:
             logging.error(f"Error porting data from movement_temp to movement: {e}")
-            session.rollback()
             raise
-        finally:
-            session.close()
     
-    def load_qualifying_flights_to_demand(self, is_initial: bool, start_date: str = None, end_date: str = None) -> int:
+    def load_qualifying_flights_to_demand(self, is_initial: bool, start_date: str = None, end_date: str = None, session=None) -> int:
         """Load flights that are not empty into demand table"""
         try:
-            session = self.db_manager.get_session()
+            with self._session(session) as session:
+                # Clear the demand table based on load type
+                self._clear_table(session, 'demand', is_initial, start_date, end_date, 'outtime')
 
-            # Clear the demand table based on load type
-            self._clear_table(session, 'demand', is_initial, start_date, end_date, 'outtime')
-
-            # Upsert qualifying flights into demand table from movement_temp
-            # Criteria: isEmpty=false (isposition=0)
-            demand_query = text("""
-                INSERT INTO demand (
-                    id, legnumber, tripnumber, requestaircrafttypeid, requestaircraftcategoryid,
-                    fromairportid, toairportid, fromfboid, tofboid, aircraftid, outtime, intime,
-                    primarypaxid, numberpassenger, flighttime, blocktime, status, flexbefore, flexafter,
-                    isowner, iswholesale, isofffleet, fmsversion, fmsid, createtime
-                )
-                SELECT
-                    id,
-                    1 as legnumber,
-                    tripnumber,
-                    NULL as requestaircrafttypeid,
-                    NULL as requestaircraftcategoryid,
-                    fromairportid,
-                    toairportid,
-                    fromfboid,
-                    tofboid,
-                    aircraftid,
-                    outtime,
-                    intime,
-                    NULL as primarypaxid,
-                    numberpassenger,
-                    flighttime,
-                    blocktime,
-                    status,
-                    0 as flexbefore,
-                    0 as flexafter,
-                    isowner,
-                    0 as iswholesale,
-                    0 as isofffleet,
-                    fmsversion,
-                    tripid as fmsid,
-                    createtime
-                FROM movement_temp AS new
-                WHERE isposition = 0
-                ON DUPLICATE KEY UPDATE
-                    legnumber = VALUES(legnumber),
-                    tripnumber = new.tripnumber,
-                    requestaircrafttypeid = VALUES(requestaircrafttypeid),
-                    requestaircraftcategoryid = VALUES(requestaircraftcategoryid),
-                    fromairportid = new.fromairportid,
-                    toairportid = new.toairportid,
-                    fromfboid = new.fromfboid,
-                    tofboid = new.tofboid,
-                    aircraftid = new.aircraftid,
-                    outtime = new.outtime,
-                    intime = new.intime,
-                    primarypaxid = VALUES(primarypaxid),
-                    numberpassenger = new.numberpassenger,
-                    flighttime = new.flighttime,
-                    blocktime = new.blocktime,
-                    status = new.status,
-                    flexbefore = VALUES(flexbefore),
-                    flexafter = VALUES(flexafter),
-                    isowner = new.isowner,
-                    iswholesale = VALUES(iswholesale),
-                    isofffleet = VALUES(isofffleet),
-                    fmsversion = new.fmsversion,
-                    fmsid = new.tripid,
-                    createtime = new.createtime
-            """)
-
-            result = session.execute(demand_query)
-            session.commit()
+                # Upsert qualifying flights into demand table from movement_temp
+                # Criteria: isEmpty=false (isposition=0)
+                result = session.execute(_DEMAND_SQL)
 
             rows_affected = result.rowcount
             logging.info(f"Successfully loaded qualifying flights into demand table: {rows_affected} rows affected (inserted or updated)")
@@ -246,10 +248,24 @@ class FlightLoader:
 
         except Exception as e:
             logging.error(f"Error loading qualifying flights to demand: {e}")
-            session.rollback()
             raise
-        finally:
-            session.close()
+
+    def finalize_movement_and_demand(self, is_initial: bool, start_date: str = None, end_date: str = None, session=None) -> Dict[str, int]:
+        """Port movement_temp to movement and load qualifying flights to demand in a single transaction
+
+        Both steps are server-side INSERT ... SELECT from movement_temp, so they share one
+        session and one commit. Note that TRUNCATE (initial loads) commits implicitly in MySQL.
+        """
+        try:
+            with self._session(session) as session:
+                movement_count = self.port_movement_temp_to_movement(is_initial, start_date, end_date, session=session)
+                demand_count = self.load_qualifying_flights_to_demand(is_initial, start_date, end_date, session=session)
+
+            return {'movement_loaded': movement_count, 'demand_loaded': demand_count}
+
+        except Exception as e:
+            logging.error(f"Error porting movement_temp to movement and demand: {e}")
+            raise
 
     def _build_aircraft_lookups(self, session) -> Dict:
         """Build lookup dictionary for aircraft by tail number
@@ -351,7 +367,7 @@ class FlightLoader:
                 # Match trip.id to movement_temp.tripid (can have multiple demandids per trip)
                 demandids = tripid_to_demandids.get(tripid)
                 if not demandids:
-                    logging.debug(f"No matching demandids for tripid {tripid}")
+                    logging.debug("No matching demandids for tripid %s", tripid)
                     continue
 
                 # Look up aircraft info by tail number
@@ -424,22 +440,16 @@ class FlightLoader:
             logging.error(f"Error processing crew assignments: {e}")
             raise
     
-    def get_flight_date_range(self, flight_data: List[Dict]) -> tuple:
-        """Extract date range from flight data for crew assignment processing"""
-        if not flight_data:
-            return None, None
-        
-        
-        dates = []
-        
-        for flight in flight_data:
-            scheduled_departure = parse_iso_datetime(safe_get(flight, 'scheduledDepartureDateUTC'))
-            if scheduled_departure:
-                dates.append(scheduled_departure.date())
+    def get_flight_date_range(self, movement_records: List[MovementRecord]) -> tuple:
+        """Extract date range from the transformed movements for crew assignment processing
+
+        Uses the departure times the transform already parsed rather than parsing the raw flights again.
+        """
+        departures = [record.outtime for record in movement_records if record.outtime is not None]
         
-        if dates:
-            min_date = min(dates)
-            max_date = max(dates)
+        if departures:
+            min_date = min(departures).date()
+            max_date = max(departures).date()
             logging.info(f"Flight data date range: {min_date} to {max_date}")
             return min_date, max_date
         
@@ -467,34 +477,36 @@ class FlightLoader:
             )
 
             # Single transformation producing both movement and crew assignment records
-            transformed_data = self.flight_transformer.transform_flight_data(flight_data, lookups)
+            transformed_data = self.flight_transformer.transform_flight_data(
+                lookup_sets['valid_flights'], lookups, lookup_sets['batch_columns']
+            )
             movement_records = transformed_data['movements']
             crew_assignment_records = transformed_data['crew_assignments']
 
             # Step 1: Load movement_temp and crew_assignments in parallel
             logging.info("Step 1: Loading movement_temp and crew assignments in parallel")
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-                # Submit both loading operations to run in parallel
-                movement_future = executor.submit(self.load_to_movement_temp, movement_records)
-                crew_assignment_future = executor.submit(self.load_crew_assignments, crew_assignment_records)
-
-                # Wait for both to complete
-                temp_count = movement_future.result()
-                crew_assignment_count = crew_assignment_future.result()
+            # movement_temp, movement and demand share one session and commit once;
+            # only the movement thread touches the session until it is joined
+            with self.db_manager.session_scope() as session:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                    # Submit both loading operations to run in parallel
+                    movement_future = executor.submit(self.load_to_movement_temp, movement_records, session)
+                    crew_assignment_future = executor.submit(self.load_crew_assignments, crew_assignment_records)
 
-            results['movement_temp_loaded'] = temp_count
-            results['crew_assignments_loaded'] = crew_assignment_count
+                    # Wait for both to complete
+                    temp_count = movement_future.result()
+                    crew_assignment_count = crew_assignment_future.result()
 
-            # Step 2: Port data from movement_temp to movement table
-            logging.info("Step 2: Porting data from movement_temp to movement table")
-            movement_count = self.port_movement_temp_to_movement(is_initial, start_date, end_date)
-            results['movement_loaded'] = movement_count
+                results['movement_temp_loaded'] = temp_count
+                results['crew_assignments_loaded'] = crew_assignment_count
 
-            # Step 3: Load qualifying flights into demand table
-            logging.info("Step 3: Loading qualifying flights into demand table")
-            demand_count = self.load_qualifying_flights_to_demand(is_initial, start_date, end_date)
-            results['demand_loaded'] = demand_count
+                # Steps 2-3: Port data from movement_temp to movement and load qualifying flights into demand
+                logging.info("Steps 2-3: Porting movement_temp to movement and loading qualifying flights into demand")
+                finalize_counts = self.finalize_movement_and_demand(is_initial, start_date, end_date, session=session)
+                movement_count = finalize_counts['movement_loaded']
+                demand_count = finalize_counts['demand_loaded']
+                results.update(finalize_counts)
 
             # Step 3.5: Populate aircraft request info in demand table
             logging.info("Step 3.5: Populating aircraft request info in demand table")
@@ -503,7 +515,7 @@ class FlightLoader:
 
             # Step 4: Transfer crew assignments from temp to target table (create shifts)
             logging.info("Step 4: Transferring crew assignments from temp to target table")
-            date_range = self.get_flight_date_range(flight_data)
+            date_range = self.get_flight_date_range(movement_records)
             if date_range[0] and date_range[1]:
                 crew_shifts_count = self.crew_assignment_loader.transfer_temp_to_target(date_range)
                 results['crew_shifts_loaded'] = crew_shifts_count
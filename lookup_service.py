@@ -1,38 +1,60 @@
 import logging
-from typing import Dict, List, Set
-from sqlalchemy import text
+import concurrent.futures
+from typing import Callable, Dict, Iterable, Iterator, List, Set
+from sqlalchemy import bindparam, text
 from database import DatabaseManager
 
+# Maximum number of values bound into a single IN (...) clause
+LOOKUP_BATCH_SIZE = 1000
+
+# Lookup statements are built once; the expanding parameters keep one statement for every IN-list length.
+# full_name is an indexed generated column (migrations/001_add_crew_full_name.sql)
+_CREW_IDS_SQL = text("""
+    SELECT full_name, id
+    FROM crew
+    WHERE full_name IN :names
+""").bindparams(bindparam('names', expanding=True))
+
+_AIRCRAFT_IDS_SQL = text("""
+    SELECT tailnumber, id
+    FROM aircraft
+    WHERE tailnumber IN :tails
+""").bindparams(bindparam('tails', expanding=True))
+
+# Keyed by uppercased code so callers can look up normalized codes directly
+_AIRPORT_IDS_SQL = text("""
+    SELECT UPPER(icaocode), id
+    FROM airport
+    WHERE icaocode IN :icaos
+""").bindparams(bindparam('icaos', expanding=True))
+
+
+def _batched(values: Iterable[str], size: int = LOOKUP_BATCH_SIZE) -> Iterator[List[str]]:
+    """Yield sorted lists of at most `size` values"""
+    ordered = sorted(values)
+    for start in range(0, len(ordered), size):
+        yield ordered[start:start + size]
+
+
 class LookupService:
     """Centralized service for all entity ID lookups"""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
     
+    def _lookup(self, values: Set[str], fetch: Callable[..., Dict[str, int]]) -> Dict[str, int]:
+        """Run a lookup query on its own session"""
+        # The session is closed (and its connection returned to the pool) even if the lookup raises
+        with self.db_manager.get_session() as session:
+            return fetch(session, values)
+    
     def get_bulk_crew_lookup(self, crew_names: Set[str]) -> Dict[str, int]:
         """Get crew ID lookups for a set of crew names"""
         if not crew_names:
             return {}
             
         try:
-            session = self.db_manager.get_session()
-            
-            # Build query to find crew by full name
-            placeholders = ','.join([':name' + str(i) for i in range(len(crew_names))])
-            query = text(f"""
-                SELECT id, CONCAT(firstname, ' ', lastname) as full_name 
-                FROM crew 
-                WHERE CONCAT(firstname, ' ', lastname) IN ({placeholders})
-            """)
-            
-            # Create parameter dict
-            params = {f'name{i}': name for i, name in enumerate(crew_names)}
-            results = session.execute(query, params).fetchall()
-            
-            crew_lookup = {}
-            for row in results:
-                crew_id, full_name = row
-                crew_lookup[full_name] = crew_id
+            crew_lookup = self._lookup(crew_names, self._query_crew_ids)
             
             logging.info(f"Found {len(crew_lookup)} crew members from {len(crew_names)} requested")
             return crew_lookup
@@ -40,8 +62,16 @@ class LookupService:
         except Exception as e:
             logging.error(f"Error in bulk crew lookup: {e}")
             return {}
-        finally:
-            session.close()
+    
+    def _query_crew_ids(self, session, crew_names: Set[str]) -> Dict[str, int]:
+        """Query crew IDs by full name"""
+        crew_lookup = {}
+        
+        # Query in batches to keep each IN list small
+        for batch in _batched(crew_names):
+            crew_lookup.update(session.execute(_CREW_IDS_SQL, {'names': batch}).all())
+        
+        return crew_lookup
     
     def get_bulk_aircraft_lookup(self, tail_numbers: Set[str]) -> Dict[str, int]:
         """Get aircraft ID lookups for a set of tail numbers"""
@@ -49,24 +79,7 @@ class LookupService:
             return {}
             
         try:
-            session = self.db_manager.get_session()
-            
-            # Build query to find aircraft by tail number
-            placeholders = ','.join([':tail' + str(i) for i in range(len(tail_numbers))])
-            query = text(f"""
-                SELECT id, tailnumber 
-                FROM aircraft 
-                WHERE tailnumber IN ({placeholders})
-            """)
-            
-            # Create parameter dict
-            params = {f'tail{i}': tail for i, tail in enumerate(tail_numbers)}
-            results = session.execute(query, params).fetchall()
-            
-            aircraft_lookup = {}
-            for row in results:
-                aircraft_id, tailnumber = row
-                aircraft_lookup[tailnumber] = aircraft_id
+            aircraft_lookup = self._lookup(tail_numbers, self._query_aircraft_ids)
             
             logging.info(f"Found {len(aircraft_lookup)} aircraft from {len(tail_numbers)} requested")
             return aircraft_lookup
@@ -74,8 +87,16 @@ class LookupService:
         except Exception as e:
             logging.error(f"Error in bulk aircraft lookup: {e}")
             return {}
-        finally:
-            session.close()
+    
+    def _query_aircraft_ids(self, session, tail_numbers: Set[str]) -> Dict[str, int]:
+        """Query aircraft IDs by tail number"""
+        aircraft_lookup = {}
+        
+        # Query in batches to keep each IN list small
+        for batch in _batched(tail_numbers):
+            aircraft_lookup.update(session.execute(_AIRCRAFT_IDS_SQL, {'tails': batch}).all())
+        
+        return aircraft_lookup
     
     def get_bulk_airport_lookup(self, airport_codes: Set[str]) -> Dict[str, int]:
         """Get airport ID lookups for a set of ICAO codes"""
@@ -83,24 +104,7 @@ class LookupService:
             return {}
             
         try:
-            session = self.db_manager.get_session()
-            
-            # Build query to find airports by ICAO code
-            placeholders = ','.join([':icao' + str(i) for i in range(len(airport_codes))])
-            query = text(f"""
-                SELECT id, icaocode 
-                FROM airport 
-                WHERE icaocode IN ({placeholders})
-            """)
-            
-            # Create parameter dict
-            params = {f'icao{i}': code for i, code in enumerate(airport_codes)}
-            results = session.execute(query, params).fetchall()
-            
-            airport_lookup = {}
-            for row in results:
-                airport_id, icao = row
-                airport_lookup[icao] = airport_id
+            airport_lookup = self._lookup(airport_codes, self._query_airport_ids)
             
             logging.info(f"Found {len(airport_lookup)} airports from {len(airport_codes)} requested")
             return airport_lookup
@@ -108,22 +112,36 @@ class LookupService:
         except Exception as e:
             logging.error(f"Error in bulk airport lookup: {e}")
             return {}
-        finally:
-            session.close()
+    
+    def _query_airport_ids(self, session, airport_codes: Set[str]) -> Dict[str, int]:
+        """Query airport IDs by ICAO code"""
+        airport_lookup = {}
+        
+        # Query in batches to keep each IN list small
+        for batch in _batched(airport_codes):
+            airport_lookup.update(session.execute(_AIRPORT_IDS_SQL, {'icaos': batch}).all())
+        
+        return airport_lookup
     
     def get_bulk_lookups(self, crew_names: Set[str] = None, 
                         aircraft_tail_numbers: Set[str] = None,
                         airport_codes: Set[str] = None) -> Dict[str, Dict[str, int]]:
         """Perform multiple bulk lookups in one call for efficiency"""
-        results = {}
-        
-        if crew_names:
-            results['crew'] = self.get_bulk_crew_lookup(crew_names)
-        
-        if aircraft_tail_numbers:
-            results['aircraft'] = self.get_bulk_aircraft_lookup(aircraft_tail_numbers)
-        
-        if airport_codes:
-            results['airports'] = self.get_bulk_airport_lookup(airport_codes)
+        if not crew_names and not aircraft_tail_numbers and not airport_codes:
+            logging.info("No lookup values collected, skipping bulk lookups")
+            return {}
         
-        return results
\ No newline at end of file
+        # Each lookup opens its own session, so they can run concurrently
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {}
+            
+            if crew_names:
+                futures['crew'] = executor.submit(self.get_bulk_crew_lookup, crew_names)
+            
+            if aircraft_tail_numbers:
+                futures['aircraft'] = executor.submit(self.get_bulk_aircraft_lookup, aircraft_tail_numbers)
+            
+            if airport_codes:
+                futures['airports'] = executor.submit(self.get_bulk_airport_lookup, airport_codes)
+            
+            return {key: future.result() for key, future in futures.items()}
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- Add an indexed full_name column to crew for bulk crew lookups by name.
+-- LookupService.get_bulk_crew_lookup filters on this column; without it the
+-- lookup has to evaluate CONCAT(firstname, ' ', lastname) for every row.
+-- Requires MySQL 5.7+ (stored generated columns). Run once per database.
+
+ALTER TABLE crew
+    ADD COLUMN full_name VARCHAR(255)
+        GENERATED ALWAYS AS (CONCAT(firstname, ' ', lastname)) STORED,
+    ADD INDEX idx_crew_full_name (full_name);
@@ -1,6 +1,6 @@
 import logging
+from collections import defaultdict
 from typing import Dict, List, Tuple
-from statistics import mean
 from data_utils import safe_get, clean_string, safe_int
 
 
@@ -10,26 +10,36 @@ class AircraftCategoryTransformer:
     def __init__(self):
         self.category_capacity_map = {}
         self.sorted_categories = []
+        self._name_to_id = {}
     
     def calculate_category_capacities(self, aircraft_data: List[Dict]) -> Dict[str, float]:
         """Calculate mean capacity for each aircraft category based on aircraft data"""
-        category_capacities = {}
+        # Running [sum, count] of capacities per category
+        category_totals = defaultdict(lambda: [0, 0])
+        
+        # Local aliases avoid global lookups in the per-aircraft loop
+        get, clean, to_int = safe_get, clean_string, safe_int
         
         for aircraft in aircraft_data:
-            if safe_get(aircraft, 'active') and safe_get(aircraft, 'managed'):
-                aircraft_category = clean_string(safe_get(aircraft, 'aircraftCategory'))
-                capacity = safe_int(safe_get(aircraft, 'capacity'))
-                
-                if aircraft_category and capacity and capacity > 0:
-                    if aircraft_category not in category_capacities:
-                        category_capacities[aircraft_category] = []
-                    category_capacities[aircraft_category].append(capacity)
+            if not (get(aircraft, 'active') and get(aircraft, 'managed')):
+                continue
+            
+            # Check capacity first so the category is only cleaned for usable aircraft
+            capacity = to_int(get(aircraft, 'capacity'))
+            if not capacity or capacity <= 0:
+                continue
+            
+            aircraft_category = clean(get(aircraft, 'aircraftCategory'))
+            if aircraft_category:
+                totals = category_totals[aircraft_category]
+                totals[0] += capacity
+                totals[1] += 1
         
         # Calculate mean capacity for each category
         category_means = {}
-        for category, capacities in category_capacities.items():
-            category_means[category] = mean(capacities)
-            logging.debug(f"Category '{category}': {len(capacities)} aircraft, mean capacity: {category_means[category]:.1f}")
+        for category, (total, count) in category_totals.items():
+            category_means[category] = total / count
+            logging.debug("Category '%s': %d aircraft, mean capacity: %.1f", category, count, category_means[category])
         
         self.category_capacity_map = category_means
         logging.info(f"Calculated capacities for {len(category_means)} aircraft categories")
@@ -66,12 +76,15 @@ class AircraftCategoryTransformer:
         # Combine sorted categories with missing ones at the end
         all_categories = categories_with_capacity + missing_capacity_categories
         
-        # Assign auto-increment IDs starting from 1
+        # Assign auto-increment IDs starting from 1, indexing them by name for lookups
         sorted_categories_with_ids = []
+        name_to_id = {}
         for idx, (category, mean_capacity) in enumerate(all_categories, start=1):
             sorted_categories_with_ids.append((category, idx, mean_capacity))
+            name_to_id.setdefault(clean_string(safe_get(category, 'name')), idx)
         
         self.sorted_categories = sorted_categories_with_ids
+        self._name_to_id = name_to_id
         
         # Log the sorted order
         logging.info("Aircraft categories sorted by capacity:")
@@ -86,11 +99,7 @@ class AircraftCategoryTransformer:
     
     def get_category_id_by_name(self, category_name: str) -> int:
         """Get the auto-increment ID for a category by name"""
-        clean_name = clean_string(category_name)
-        for category, category_id, _ in self.sorted_categories:
-            if clean_string(safe_get(category, 'name')) == clean_name:
-                return category_id
-        return None
+        return self._name_to_id.get(clean_string(category_name))
     
     def get_sorted_categories(self) -> List[Tuple[Dict, int, float]]:
         """Get the sorted categories list"""
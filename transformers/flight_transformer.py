@@ -1,66 +1,270 @@
+import heapq
 import logging
 import pandas as pd
-from typing import Dict, List, Set, Optional
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from collections import Counter
 from datetime import datetime
-from data_utils import safe_get, clean_string, safe_int, safe_float, parse_iso_datetime, parse_flight_datetime, generate_stable_id
+from data_utils import safe_get, clean_string, safe_int, safe_float, parse_flight_datetime, generate_stable_id, parse_iso_datetime_series, series_to_list, get_utc_now
 from lookup_service import LookupService
 
+# Maximum number of unmatched crew/airports/aircraft listed individually in the logs
+UNMATCHED_LOG_LIMIT = 50
+
+# Padding between block and wheels times (out -> off, on -> in)
+OOOI_PADDING_MINUTES = 6
+OOOI_PADDING = pd.Timedelta(minutes=OOOI_PADDING_MINUTES)
+
+# Batch column name -> API field for every timestamp parsed in the prepass
+FLIGHT_TIME_FIELDS = {
+    'scheduled_departure': 'scheduledDepartureDateUTC',
+    'scheduled_arrival': 'scheduledArrivalDateUTC',
+    'actual_departure': 'actualDepartureDateUTC',
+    'actual_arrival': 'actualArrivalDateUTC',
+    'out_blocks': 'outOfBlocksUTC',
+    'in_blocks': 'inBlocksUTC'
+}
+
+
+class MovementRecord(NamedTuple):
+    """A movement_temp row; field names and order match the INSERT column list"""
+    id: int
+    demandid: Optional[int]
+    fromairportid: Optional[int]
+    toairportid: Optional[int]
+    fromfboid: Optional[int]
+    tofboid: Optional[int]
+    aircraftid: Optional[int]
+    outtime: Optional[datetime]
+    offtime: Optional[datetime]
+    ontime: Optional[datetime]
+    intime: Optional[datetime]
+    actualouttime: Optional[datetime]
+    actualofftime: Optional[datetime]
+    actualontime: Optional[datetime]
+    actualintime: Optional[datetime]
+    flighttime: Optional[float]
+    blocktime: Optional[float]
+    status: Optional[str]
+    picid: Optional[int]
+    sicid: Optional[int]
+    fmsversion: Optional[str]
+    fmsid: str
+    createtime: datetime
+    fromairport: Optional[str]
+    toairport: Optional[str]
+    tailnumber: Optional[str]
+    pic: Optional[str]
+    sic: Optional[str]
+    numberpassenger: Optional[int]
+    tripnumber: Optional[int]
+    isposition: int
+    isowner: int
+    tripid: Optional[str]
+
 
 class FlightTransformer:
     """Transform flight data to match movement_temp schema"""
     
+    # crewassignment position ids by lowercased crewPosition
+    PIC_POSITION_ID = 1
+    SIC_POSITION_ID = 2
+    _POSITION_IDS = {'pic': PIC_POSITION_ID, 'sic': SIC_POSITION_ID}
+    
     def __init__(self, db_manager):
         self.db_manager = db_manager
         self.lookup_service = LookupService(db_manager)
         
     
-    def extract_shared_flight_data(self, flight: Dict) -> Dict:
-        """Extract all shared data from a flight record that's needed by both movement and crew assignment processing"""
+    def parse_flight_times(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Parse all flight timestamps for the whole batch and derive OOOI times
+
+        Returns a dict of per-flight value lists, indexed like flight_data
+        """
+        # Parse every timestamp column in a single to_datetime call, then split it back up
+        flight_count = len(flight_data)
+        raw_times = [safe_get(flight, field) for field in FLIGHT_TIME_FIELDS.values() for flight in flight_data]
+        parsed_times = parse_iso_datetime_series(raw_times)
+        parsed_columns = {
+            column: parsed_times.iloc[i * flight_count:(i + 1) * flight_count].reset_index(drop=True)
+            for i, column in enumerate(FLIGHT_TIME_FIELDS)
+        }
+
+        oooi_times = self.calculate_oooi_times(parsed_columns['scheduled_departure'], parsed_columns['scheduled_arrival'])
+
+        times = {column: series_to_list(values) for column, values in parsed_columns.items()}
+        times.update({
+            'offtime': series_to_list(oooi_times['offtime']),
+            'ontime': series_to_list(oooi_times['ontime']),
+            'flight_time': series_to_list(oooi_times['flight_time']),
+            'block_time': series_to_list(oooi_times['block_time'])
+        })
+
+        return times
+    
+    def normalize_airport_codes(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Uppercase departure/arrival ICAO codes for the whole batch in one vectorized pass"""
+        departure_icao = pd.Series([safe_get(flight, 'departureICAO') for flight in flight_data], dtype='string').str.upper()
+        arrival_icao = pd.Series([safe_get(flight, 'arrivalICAO') for flight in flight_data], dtype='string').str.upper()
+
+        return {
+            'departure_icao_upper': series_to_list(departure_icao),
+            'arrival_icao_upper': series_to_list(arrival_icao)
+        }
+    
+    def clean_tail_numbers(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Clean tail numbers once for the batch so lookups and outputs use the same value"""
+        return {'tail_number': [clean_string(safe_get(flight, 'tailNumber')) for flight in flight_data]}
+    
+    def has_valid_crew(self, flight: Dict) -> bool:
+        """Check that a flight's crew, if present, is a list of crew member dicts with string positions"""
+        crew_list = flight.get('crew')
+        if not crew_list:
+            return True
+        if not isinstance(crew_list, list):
+            return False
+        for crew_member in crew_list:
+            if not isinstance(crew_member, dict):
+                return False
+            crew_position = crew_member.get('crewPosition')
+            if crew_position is not None and not isinstance(crew_position, str):
+                return False
+        return True
+    
+    def partition_valid_flights(self, flight_data: List[Dict]) -> List[Dict]:
+        """Drop flights that cannot be transformed, logging them once for the whole batch
+
+        A flight needs a string FMS id to derive its stable movement id, and its crew
+        (if any) must be a list of crew member records.
+        """
+        valid_flights = []
+        invalid_trips = []
+        malformed_crew_ids = []
+        for flight in flight_data:
+            if not isinstance(flight, dict):
+                invalid_trips.append('unknown')
+                continue
+            
+            fms_id = flight.get('id')
+            if not (isinstance(fms_id, str) and fms_id):
+                invalid_trips.append(flight.get('tripNumber', 'unknown'))
+            elif not self.has_valid_crew(flight):
+                malformed_crew_ids.append(fms_id)
+            else:
+                valid_flights.append(flight)
+        
+        if invalid_trips:
+            logging.error(f"Skipping {len(invalid_trips)} flight records without a valid id (trip numbers: {invalid_trips})")
+        
+        if malformed_crew_ids:
+            logging.error(f"Skipping {len(malformed_crew_ids)} flight records with malformed crew data (flight ids: {malformed_crew_ids})")
+        
+        return valid_flights
+    
+    def parse_create_dates(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Parse createDate for the batch, parsing each distinct string only once
+
+        createDate uses the '8/4/2025 8:41:02 PM' format, so it cannot go through
+        the vectorized ISO parser; many flights share the same value.
+        """
+        parsed_dates = {}
+        create_times = []
+        for flight in flight_data:
+            create_date_str = safe_get(flight, 'createDate')
+            if not create_date_str:
+                create_times.append(None)
+                continue
+            if create_date_str not in parsed_dates:
+                parsed_dates[create_date_str] = parse_flight_datetime(create_date_str)
+            create_times.append(parsed_dates[create_date_str])
+        
+        return {'create_time': create_times}
+    
+    def prepare_batch_columns(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Compute the remaining column-wise values for a batch of flights before the per-flight loop"""
+        batch_columns = self.parse_flight_times(flight_data)
+        batch_columns.update(self.parse_create_dates(flight_data))
+        return batch_columns
+    
+    def map_lookup_ids(self, flight_data: List[Dict], batch_columns: Dict[str, list],
+                       lookups: Dict[str, Dict[str, int]]) -> Dict[str, list]:
+        """Map airport codes and tail numbers to ids for the whole batch; unmatched values become None"""
+        airport_lookup = lookups.get('airports', {})
+        aircraft_lookup = lookups.get('aircraft', {})
+
+        def map_ids(values: list, lookup: Dict[str, int]) -> list:
+            return series_to_list(pd.Series(values, dtype=object).map(lookup).astype('Int64'))
+
+        return {
+            'from_airport_id': map_ids(batch_columns['departure_icao_upper'], airport_lookup),
+            'to_airport_id': map_ids(batch_columns['arrival_icao_upper'], airport_lookup),
+            'aircraft_id': map_ids(batch_columns['tail_number'], aircraft_lookup)
+        }
+    
+    def iter_crew_members(self, crew_list: List[Dict]) -> Iterator[Tuple[str, str, Optional[int]]]:
+        """Yield (name, position, position_id) for each crew member of a flight"""
+        position_ids = self._POSITION_IDS
+        for crew_member in crew_list:
+            crew_position = (safe_get(crew_member, 'crewPosition') or '').lower()
+            first_name = safe_get(crew_member, 'firstName')
+            last_name = safe_get(crew_member, 'lastName')
+            crew_name = f"{first_name or ''} {last_name or ''}".strip() if first_name or last_name else ''
+            
+            yield crew_name, crew_position, position_ids.get(crew_position)
+    
+    def extract_crew_names(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Extract PIC/SIC names for the batch (the last crew member in each position wins)"""
+        pic_names = []
+        sic_names = []
+        for flight in flight_data:
+            pic_name = None
+            sic_name = None
+            for crew_name, _, position_id in self.iter_crew_members(safe_get(flight, 'crew') or []):
+                if position_id == self.PIC_POSITION_ID:
+                    pic_name = crew_name
+                elif position_id == self.SIC_POSITION_ID:
+                    sic_name = crew_name
+            pic_names.append(pic_name)
+            sic_names.append(sic_name)
+        
+        return {'pic_name': pic_names, 'sic_name': sic_names}
+    
+    def collect_batch_columns(self, flight_data: List[Dict]) -> Dict[str, list]:
+        """Compute the crew name, airport code and tail number columns shared by lookup collection and the transform"""
+        batch_columns = self.extract_crew_names(flight_data)
+        batch_columns.update(self.normalize_airport_codes(flight_data))
+        batch_columns.update(self.clean_tail_numbers(flight_data))
+        return batch_columns
+    
+    def extract_shared_flight_data(self, flight: Dict, batch_columns: Dict[str, list], idx: int,
+                                   default_create_time: Optional[datetime] = None) -> Dict:
+        """Extract all shared data from a flight record that's needed by both movement and crew assignment processing
+
+        batch_columns comes from prepare_batch_columns and idx is the flight's position in that batch.
+        default_create_time is used for flights without a createDate (defaults to now).
+        """
+        # Partitioned flights are non-empty dicts, so read raw fields with a bound get
+        get = flight.get
+        
         # Basic flight identifiers
-        fms_id = safe_get(flight, 'id')
-        trip_id = safe_get(flight, 'tripID')
+        fms_id = get('id')
+        trip_id = get('tripID')
         stable_id = generate_stable_id(fms_id)
-        tail_number = safe_get(flight, 'tailNumber')
+        tail_number = batch_columns['tail_number'][idx]
         
         # Extract all flight times once
-        scheduled_departure = parse_iso_datetime(safe_get(flight, 'scheduledDepartureDateUTC'))
-        scheduled_arrival = parse_iso_datetime(safe_get(flight, 'scheduledArrivalDateUTC'))
-        actual_departure = parse_iso_datetime(safe_get(flight, 'actualDepartureDateUTC'))
-        actual_arrival = parse_iso_datetime(safe_get(flight, 'actualArrivalDateUTC'))
-        out_blocks = parse_iso_datetime(safe_get(flight, 'outOfBlocksUTC'))
-        in_blocks = parse_iso_datetime(safe_get(flight, 'inBlocksUTC'))
-        
-        # Parse create date once
-        create_date_str = safe_get(flight, 'createDate')
-        create_time = None
-        if create_date_str:
-            from data_utils import parse_flight_datetime
-            create_time = parse_flight_datetime(create_date_str)
-        if not create_time:
-            create_time = datetime.utcnow()
-        
-        # Extract crew information once
-        crew_list = safe_get(flight, 'crew', [])
-        pic_name = None
-        sic_name = None
-        crew_members = []
+        scheduled_departure = batch_columns['scheduled_departure'][idx]
+        scheduled_arrival = batch_columns['scheduled_arrival'][idx]
+        actual_departure = batch_columns['actual_departure'][idx]
+        actual_arrival = batch_columns['actual_arrival'][idx]
+        out_blocks = batch_columns['out_blocks'][idx]
+        in_blocks = batch_columns['in_blocks'][idx]
         
-        for crew_member in crew_list:
-            crew_position = safe_get(crew_member, 'crewPosition', '').lower()
-            first_name = safe_get(crew_member, 'firstName', '')
-            last_name = safe_get(crew_member, 'lastName', '')
-            crew_name = f"{first_name} {last_name}".strip()
-            
-            if crew_position == 'pic':
-                pic_name = crew_name
-            elif crew_position == 'sic':
-                sic_name = crew_name
-            
-            crew_members.append({
-                'name': crew_name,
-                'position': crew_position,
-                'position_id': 1 if crew_position == 'pic' else 2 if crew_position == 'sic' else None
-            })
+        # Create date was parsed for the batch; fall back to the batch timestamp
+        create_time = batch_columns['create_time'][idx] or default_create_time or get_utc_now()
+        
+        # PIC/SIC names were extracted for the batch; the full crew is only
+        # walked again if crew assignments are built
+        crew_list = get('crew') or []
         
         return {
             # IDs and basic info
@@ -69,9 +273,24 @@ class FlightTransformer:
             'stable_id': stable_id,
             'tail_number': tail_number,
             
+            # Airports (raw codes for output, uppercased codes for lookups)
+            'departure_icao': get('departureICAO'),
+            'arrival_icao': get('arrivalICAO'),
+            'departure_icao_upper': batch_columns['departure_icao_upper'][idx],
+            'arrival_icao_upper': batch_columns['arrival_icao_upper'][idx],
+            
+            # Ids mapped for the batch by map_lookup_ids (None if unmatched)
+            'from_airport_id': batch_columns['from_airport_id'][idx],
+            'to_airport_id': batch_columns['to_airport_id'][idx],
+            'aircraft_id': batch_columns['aircraft_id'][idx],
+            
             # Times
             'scheduled_departure': scheduled_departure,
             'scheduled_arrival': scheduled_arrival,
+            'offtime': batch_columns['offtime'][idx],
+            'ontime': batch_columns['ontime'][idx],
+            'flight_time': batch_columns['flight_time'][idx],
+            'block_time': batch_columns['block_time'][idx],
             'actual_departure': actual_departure,
             'actual_arrival': actual_arrival,
             'out_blocks': out_blocks,
@@ -79,48 +298,40 @@ class FlightTransformer:
             'create_time': create_time,
             
             # Crew information
-            'pic_name': pic_name,
-            'sic_name': sic_name,
-            'crew_members': crew_members,
+            'pic_name': batch_columns['pic_name'][idx],
+            'sic_name': batch_columns['sic_name'][idx],
             'crew_list': crew_list,
             
             # Raw flight data for other fields
             'raw_flight': flight
         }
     
-    def calculate_oooi_times(self, shared_data: Dict) -> Dict:
+    def calculate_oooi_times(self, scheduled_departure: pd.Series, scheduled_arrival: pd.Series) -> Dict[str, pd.Series]:
         """
-        Calculate OOOI times with 6-minute padding
+        Calculate OOOI times with 6-minute padding for a batch of flights
 
-        Returns dict with:
+        Returns dict of Series with:
         - outtime: scheduled_departure
         - offtime: outtime + 6 minutes
         - ontime: intime - 6 minutes
         - intime: scheduled_arrival
         - flight_time: ontime - offtime (in minutes)
         - block_time: intime - outtime (in minutes)
+
+        Missing times propagate as NaT/NaN through the vectorized arithmetic.
         """
-        
-        outtime = shared_data['scheduled_departure']
-        intime = shared_data['scheduled_arrival']
+        outtime = scheduled_departure
+        intime = scheduled_arrival
 
         # Calculate offtime and ontime with 6-minute padding
-        offtime = None
-        ontime = None
-        if outtime:
-            offtime = outtime + pd.Timedelta(minutes=6)
-        if intime:
-            ontime = intime - pd.Timedelta(minutes=6)
-
-        # Calculate flight_time = ontime - offtime (in minutes)
-        flight_time = None
-        if ontime and offtime:
-            flight_time = (ontime - offtime).total_seconds() / 60
+        offtime = outtime + OOOI_PADDING
+        ontime = intime - OOOI_PADDING
 
         # Calculate block_time = intime - outtime (in minutes)
-        block_time = None
-        if intime and outtime:
-            block_time = (intime - outtime).total_seconds() / 60
+        block_time = (intime - outtime).dt.total_seconds() / 60
+
+        # flight_time = ontime - offtime, i.e. block_time less the padding at both ends
+        flight_time = block_time - 2 * OOOI_PADDING_MINUTES
 
         return {
             'outtime': outtime,
@@ -131,90 +342,102 @@ class FlightTransformer:
             'block_time': block_time
         }
 
-    def build_movement_record(self, shared_data: Dict, lookups: Dict[str, Dict[str, int]]) -> Dict:
-        """Build a movement record from shared flight data and lookups"""
-        flight = shared_data['raw_flight']
+    def build_movement_record(self, shared_data: Dict, lookups: Dict[str, Dict[str, int]],
+                              unmatched_crew: Set[str], unmatched_airports: Set[str]) -> MovementRecord:
+        """Build a movement record from shared flight data and lookups
+
+        Crew names and airport codes that fail to resolve are added to the unmatched sets.
+        """
+        # Flights reaching this point have an id, so read raw fields with a bound get
+        # rather than the safe_get wrapper
+        get = shared_data['raw_flight'].get
         crew_lookup = lookups.get('crew', {})
-        airport_lookup = lookups.get('airports', {})
-        aircraft_lookup = lookups.get('aircraft', {})
-        
-        # Get airport lookups
-        departure_icao = safe_get(flight, 'departureICAO')
-        arrival_icao = safe_get(flight, 'arrivalICAO')
-        from_airport_id = airport_lookup.get(departure_icao.upper()) if departure_icao else None
-        to_airport_id = airport_lookup.get(arrival_icao.upper()) if arrival_icao else None
         
-        # Get aircraft ID
-        aircraft_id = aircraft_lookup.get(shared_data['tail_number']) if shared_data['tail_number'] else None
+        # Airport and aircraft ids were mapped for the whole batch
+        departure_icao = shared_data['departure_icao']
+        arrival_icao = shared_data['arrival_icao']
+        from_airport_id = shared_data['from_airport_id']
+        to_airport_id = shared_data['to_airport_id']
+        aircraft_id = shared_data['aircraft_id']
+        if from_airport_id is None and shared_data['departure_icao_upper']:
+            unmatched_airports.add(shared_data['departure_icao_upper'])
+        if to_airport_id is None and shared_data['arrival_icao_upper']:
+            unmatched_airports.add(shared_data['arrival_icao_upper'])
         
-        # Get crew IDs
-        pic_id = crew_lookup.get(shared_data['pic_name']) if shared_data['pic_name'] else None
-        sic_id = crew_lookup.get(shared_data['sic_name']) if shared_data['sic_name'] else None
-
-        oooi_times = self.calculate_oooi_times(shared_data)
+        # Get crew IDs (a single hash lookup each; None names never match)
+        pic_name = shared_data['pic_name']
+        sic_name = shared_data['sic_name']
+        pic_id = crew_lookup.get(pic_name)
+        sic_id = crew_lookup.get(sic_name)
+        if pic_id is None and pic_name:
+            unmatched_crew.add(pic_name)
+        if sic_id is None and sic_name:
+            unmatched_crew.add(sic_name)
 
         id = shared_data['stable_id']
-        passengerCount = safe_get(flight, 'passengerCount', 0)
-        isEmpty = flight.get('isEmpty')
+        passengerCount = get('passengerCount', 0)
+        isEmpty = get('isEmpty')
         
-        return {
-            'id': id,
-            'demandid': id if isEmpty is False else None,
-            'fromairportid': from_airport_id,
-            'toairportid': to_airport_id,
-            'fromfboid': safe_int(safe_get(flight, 'departureFBOHandlerID')),
-            'tofboid': safe_int(safe_get(flight, 'arrivalFBOHandlerID')),
-            'aircraftid': aircraft_id,
-            'outtime': oooi_times['outtime'],
-            'offtime': oooi_times['offtime'],
-            'ontime': oooi_times['ontime'],
-            'intime': oooi_times['intime'],
-            'actualouttime': shared_data['out_blocks'],
-            'actualofftime': shared_data['actual_departure'],
-            'actualontime': shared_data['actual_arrival'],
-            'actualintime': shared_data['in_blocks'],
-            'flighttime': oooi_times['flight_time'],
-            'blocktime': oooi_times['block_time'],
-            'status': clean_string(safe_get(flight, 'status')),
-            'picid': pic_id,
-            'sicid': sic_id,
-            'fmsversion': None,
-            'fmsid': shared_data['fms_id'],
-            'createtime': shared_data['create_time'],
-            'fromairport': departure_icao,
-            'toairport': arrival_icao,
-            'tailnumber': clean_string(shared_data['tail_number']),
-            'pic': shared_data['pic_name'],
-            'sic': shared_data['sic_name'],
-            'numberpassenger': passengerCount,
-            'tripnumber': clean_string(safe_get(flight, 'tripNumber')),
-            'isposition': 1 if isEmpty is True else 0,
-            'isowner': 1 if safe_get(flight, 'tripRegulatoryType', '') == 'Part 91' else 0,
-            'tripid': shared_data['trip_id'],
-            'tripnumber': safe_int(safe_get(flight, 'tripNumber')),
-        }
+        return MovementRecord(
+            id=id,
+            demandid=id if isEmpty is False else None,
+            fromairportid=from_airport_id,
+            toairportid=to_airport_id,
+            fromfboid=safe_int(get('departureFBOHandlerID')),
+            tofboid=safe_int(get('arrivalFBOHandlerID')),
+            aircraftid=aircraft_id,
+            outtime=shared_data['scheduled_departure'],
+            offtime=shared_data['offtime'],
+            ontime=shared_data['ontime'],
+            intime=shared_data['scheduled_arrival'],
+            actualouttime=shared_data['out_blocks'],
+            actualofftime=shared_data['actual_departure'],
+            actualontime=shared_data['actual_arrival'],
+            actualintime=shared_data['in_blocks'],
+            flighttime=shared_data['flight_time'],
+            blocktime=shared_data['block_time'],
+            status=clean_string(get('status')),
+            picid=pic_id,
+            sicid=sic_id,
+            fmsversion=None,
+            fmsid=shared_data['fms_id'],
+            createtime=shared_data['create_time'],
+            fromairport=departure_icao,
+            toairport=arrival_icao,
+            tailnumber=shared_data['tail_number'],
+            pic=shared_data['pic_name'],
+            sic=shared_data['sic_name'],
+            numberpassenger=passengerCount,
+            tripnumber=safe_int(get('tripNumber')),
+            isposition=1 if isEmpty is True else 0,
+            isowner=1 if get('tripRegulatoryType') == 'Part 91' else 0,
+            tripid=shared_data['trip_id']
+        )
     
-    def build_crew_assignment_records(self, shared_data: Dict, aircraft_id: int, crew_lookup: Dict[str, int]) -> List[Dict]:
-        """Build crew assignment records from shared flight data"""
-        if not shared_data['crew_members'] or not aircraft_id:
+    def build_crew_assignment_records(self, shared_data: Dict, aircraft_id: int, crew_lookup: Dict[str, int],
+                                      unmatched_crew: Set[str]) -> List[Dict]:
+        """Build crew assignment records from shared flight data, adding unresolved crew names to unmatched_crew"""
+        if not shared_data['crew_list'] or not aircraft_id:
             return []
         
         assignments = []
-        for crew_member in shared_data['crew_members']:
-            if crew_member['position_id'] is None:
-                logging.warning(f"Unknown crew position: {crew_member['position']} for crew member {crew_member['name']}")
+        for crew_name, crew_position, position_id in self.iter_crew_members(shared_data['crew_list']):
+            if position_id is None:
+                logging.warning("Unknown crew position: %s for crew member %s", crew_position, crew_name)
                 continue
             
             # Get crew ID from lookup
-            crew_id = crew_lookup.get(crew_member['name'])
-            if not crew_id:
-                # Skip this assignment if crew not found (will be logged in main loop)
+            crew_id = crew_lookup.get(crew_name)
+            if crew_id is None:
+                # Skip this assignment if crew not found (logged once after the main loop)
+                if crew_name:
+                    unmatched_crew.add(crew_name)
                 continue
             
             assignment = {
                 'aircraftid': aircraft_id,
                 'crewid': crew_id,
-                'positionid': crew_member['position_id'],
+                'positionid': position_id,
                 'starttime': shared_data['scheduled_departure'],
                 'endtime': shared_data['scheduled_arrival'],
                 'actualstarttime': shared_data['actual_departure'],
@@ -223,7 +446,7 @@ class FlightTransformer:
                 'fmsid': shared_data['fms_id'],
                 'createtime': shared_data['create_time'],
                 'tailnumber': shared_data['tail_number'],
-                'crewname': crew_member['name'],
+                'crewname': crew_name,
                 'pic': shared_data['pic_name'],
                 'sic': shared_data['sic_name']
             }
@@ -232,49 +455,65 @@ class FlightTransformer:
         
         return assignments
     
-    def collect_lookup_sets(self, flight_data: List[Dict]) -> Dict[str, Set[str]]:
-        """Collect all unique values needed for bulk lookups"""
+    def log_unmatched(self, values: Set[str], plural: str, label: str):
+        """Log the count of unmatched values and list the first UNMATCHED_LOG_LIMIT of them in sorted order"""
+        logging.warning(f"Found {len(values)} unmatched {plural}:")
+        for value in heapq.nsmallest(UNMATCHED_LOG_LIMIT, values):
+            logging.warning(f"  - {label} not found: {value}")
+        if len(values) > UNMATCHED_LOG_LIMIT:
+            logging.warning(f"  ... and {len(values) - UNMATCHED_LOG_LIMIT} more")
+    
+    def collect_lookup_sets(self, flight_data: List[Dict]) -> Dict:
+        """Collect all unique values needed for bulk lookups
+
+        Reads only the raw crew, airport and tail number fields; the full shared-data
+        extraction happens once, in transform_flight_data. Also returns the valid flights
+        and their collected columns so the transform can reuse them.
+        """
         crew_names = set()
         airport_codes = set()
         tail_numbers = set()
         
-        for flight in flight_data:
-            # Collect crew names using shared data extraction
-            shared_data = self.extract_shared_flight_data(flight)
-            if shared_data['pic_name']:
-                crew_names.add(shared_data['pic_name'])
-            if shared_data['sic_name']:
-                crew_names.add(shared_data['sic_name'])
-            
-            # Collect airport ICAO codes
-            departure_icao = safe_get(flight, 'departureICAO')
-            arrival_icao = safe_get(flight, 'arrivalICAO')
-            if departure_icao:
-                airport_codes.add(departure_icao.upper())
-            if arrival_icao:
-                airport_codes.add(arrival_icao.upper())
-            
-            # Collect tail numbers
-            if shared_data['tail_number']:
-                tail_numbers.add(shared_data['tail_number'])
+        flight_data = self.partition_valid_flights(flight_data)
+        batch_columns = self.collect_batch_columns(flight_data)
+        
+        # Collect PIC/SIC crew names
+        for crew_name in batch_columns['pic_name'] + batch_columns['sic_name']:
+            if crew_name:
+                crew_names.add(crew_name)
+        
+        # Collect tail numbers (cleaned once for the batch)
+        for tail_number in batch_columns['tail_number']:
+            if tail_number:
+                tail_numbers.add(tail_number)
+        
+        # Collect airport ICAO codes (normalized for the whole batch at once)
+        for code in batch_columns['departure_icao_upper'] + batch_columns['arrival_icao_upper']:
+            if code:
+                airport_codes.add(code)
         
         return {
             'crew_names': crew_names,
             'airport_codes': airport_codes,
-            'tail_numbers': tail_numbers
+            'tail_numbers': tail_numbers,
+            # Passed back to transform_flight_data so the batch is not partitioned or walked again
+            'valid_flights': flight_data,
+            'batch_columns': batch_columns
         }
     
-    def transform_flight_data(self, flight_data: List[Dict], lookups: Dict[str, Dict[str, int]]) -> Dict[str, List[Dict]]:
-        """Transform flight data to both movement_temp and crew assignment records"""
+    def transform_flight_data(self, flight_data: List[Dict], lookups: Dict[str, Dict[str, int]],
+                              collected_columns: Optional[Dict[str, list]] = None) -> Dict[str, list]:
+        """Transform flight data to movement_temp records (MovementRecord tuples) and crew assignment records (dicts)
+
+        collected_columns is the 'batch_columns' entry from collect_lookup_sets; when given,
+        flight_data must be that result's 'valid_flights'.
+        """
         if not flight_data:
             return {'movements': [], 'crew_assignments': []}
         
         # Use provided lookups
         crew_lookup = lookups.get('crew', {})
-        airport_lookup = lookups.get('airports', {})
-        aircraft_lookup = lookups.get('aircraft', {})
         
-        movement_records = []
         crew_assignment_records = []
         
         # Track unmatched items for logging
@@ -283,88 +522,87 @@ class FlightTransformer:
         unmatched_aircraft = set()
         skipped_flights = []  # Track flights skipped due to unmatched aircraft
         
-        for flight in flight_data:
-            try:
-                # Extract all shared data once
-                shared_data = self.extract_shared_flight_data(flight)
-
-                # Track unmatched crew
-                for crew_member in shared_data['crew_members']:
-                    if crew_member['name'] and not crew_lookup.get(crew_member['name']):
-                        unmatched_crew.add(crew_member['name'])
-                
-                # Track unmatched airports
-                departure_icao = safe_get(flight, 'departureICAO')
-                arrival_icao = safe_get(flight, 'arrivalICAO')
-                if departure_icao and not airport_lookup.get(departure_icao.upper()):
-                    unmatched_airports.add(departure_icao.upper())
-                if arrival_icao and not airport_lookup.get(arrival_icao.upper()):
-                    unmatched_airports.add(arrival_icao.upper())
-                
-                # Check aircraft and skip flight if aircraft not found
-                aircraft_id = aircraft_lookup.get(shared_data['tail_number']) if shared_data['tail_number'] else None
-                if shared_data['tail_number'] and not aircraft_id:
-                    unmatched_aircraft.add(shared_data['tail_number'])
-                    skipped_flight = {
-                        'fms_id': shared_data['fms_id'],
-                        'trip_number': safe_get(flight, 'tripNumber'),
-                        'tail_number': shared_data['tail_number'],
-                        'route': f"{departure_icao}->{arrival_icao}" if departure_icao and arrival_icao else "Unknown route",
-                        'scheduled_departure': safe_get(flight, 'scheduledDepartureDateUTC'),
-                        'status': safe_get(flight, 'status')
-                    }
-                    skipped_flights.append(skipped_flight)
-                    continue  # Skip processing this flight
-                
-                # Build movement record using shared data
-                movement_record = self.build_movement_record(shared_data, lookups)
-                movement_records.append(movement_record)
-                
-                # Build crew assignment records using shared data
-                crew_assignments = self.build_crew_assignment_records(shared_data, aircraft_id, crew_lookup)
-                crew_assignment_records.extend(crew_assignments)
-                
-            except Exception as e:
-                logging.error(f"Error transforming flight record {safe_get(flight, 'id', 'unknown')}: {e}")
-                continue
+        # Drop untransformable flights once, then compute column-wise values for the whole batch
+        if collected_columns is None:
+            flight_data = self.partition_valid_flights(flight_data)
+            collected_columns = self.collect_batch_columns(flight_data)
+        elif len(collected_columns['pic_name']) != len(flight_data):
+            raise ValueError("collected_columns do not match flight_data; pass the valid_flights from collect_lookup_sets")
+        batch_columns = self.prepare_batch_columns(flight_data)
+        batch_columns.update(collected_columns)
+        batch_columns.update(self.map_lookup_ids(flight_data, batch_columns, lookups))
+        
+        # One timestamp for the whole batch rather than one per flight
+        batch_create_time = get_utc_now()
+        
+        # At most one movement per flight: fill a preallocated list, then trim the skipped tail
+        movement_records = [None] * len(flight_data)
+        movement_count = 0
+        
+        for idx, flight in enumerate(flight_data):
+            # Check aircraft first and skip flight if aircraft not found, before any crew parsing
+            aircraft_id = batch_columns['aircraft_id'][idx]
+            tail_number = batch_columns['tail_number'][idx]
+            if aircraft_id is None and tail_number:
+                unmatched_aircraft.add(tail_number)
+                get = flight.get
+                departure_icao = get('departureICAO')
+                arrival_icao = get('arrivalICAO')
+                skipped_flight = {
+                    'fms_id': get('id'),
+                    'trip_number': get('tripNumber'),
+                    'tail_number': tail_number,
+                    'route': f"{departure_icao}->{arrival_icao}" if departure_icao and arrival_icao else "Unknown route",
+                    'scheduled_departure': get('scheduledDepartureDateUTC'),
+                    'status': get('status')
+                }
+                skipped_flights.append(skipped_flight)
+                continue  # Skip processing this flight
+            
+            # Extract all shared data once
+            shared_data = self.extract_shared_flight_data(flight, batch_columns, idx, batch_create_time)
+            
+            # Build movement record using shared data, tracking unmatched crew and airports
+            movement_records[movement_count] = self.build_movement_record(shared_data, lookups, unmatched_crew, unmatched_airports)
+            movement_count += 1
+            
+            # Build crew assignment records using shared data
+            crew_assignments = self.build_crew_assignment_records(shared_data, aircraft_id, crew_lookup, unmatched_crew)
+            crew_assignment_records.extend(crew_assignments)
+        
+        del movement_records[movement_count:]
         
         # Log unmatched items
         if unmatched_crew:
-            logging.warning(f"Found {len(unmatched_crew)} unmatched crew members:")
-            for crew_name in sorted(unmatched_crew):
-                logging.warning(f"  - Crew not found: {crew_name}")
+            self.log_unmatched(unmatched_crew, 'crew members', 'Crew')
         
         if unmatched_airports:
-            logging.warning(f"Found {len(unmatched_airports)} unmatched airports:")
-            for airport_code in sorted(unmatched_airports):
-                logging.warning(f"  - Airport not found: {airport_code}")
+            self.log_unmatched(unmatched_airports, 'airports', 'Airport')
         
         if unmatched_aircraft:
-            logging.warning(f"Found {len(unmatched_aircraft)} unmatched aircraft:")
-            for tail_number in sorted(unmatched_aircraft):
-                logging.warning(f"  - Aircraft not found: {tail_number}")
+            self.log_unmatched(unmatched_aircraft, 'aircraft', 'Aircraft')
         
         # Log detailed information about skipped flights
-        if skipped_flights:
-            logging.warning(f"SKIPPED {len(skipped_flights)} flights due to unmatched aircraft:")
-            logging.warning("=" * 80)
+        if skipped_flights and logging.getLogger().isEnabledFor(logging.WARNING):
+            # One log record for the whole report rather than seven per flight
+            report = [f"SKIPPED {len(skipped_flights)} flights due to unmatched aircraft:", "=" * 80]
             for flight in skipped_flights:
-                logging.warning(f"Flight ID: {flight['fms_id']}")
-                logging.warning(f"  Trip: {flight['trip_number']}")
-                logging.warning(f"  Aircraft: {flight['tail_number']} (NOT FOUND)")
-                logging.warning(f"  Route: {flight['route']}")
-                logging.warning(f"  Departure: {flight['scheduled_departure']}")
-                logging.warning(f"  Status: {flight['status']}")
-                logging.warning("-" * 40)
+                report.extend((
+                    f"Flight ID: {flight['fms_id']}",
+                    f"  Trip: {flight['trip_number']}",
+                    f"  Aircraft: {flight['tail_number']} (NOT FOUND)",
+                    f"  Route: {flight['route']}",
+                    f"  Departure: {flight['scheduled_departure']}",
+                    f"  Status: {flight['status']}",
+                    "-" * 40
+                ))
+            logging.warning("\n".join(report))
             
-            # Summary by aircraft
-            aircraft_count = {}
-            for flight in skipped_flights:
-                tail = flight['tail_number']
-                aircraft_count[tail] = aircraft_count.get(tail, 0) + 1
+            # Summary by aircraft, most skipped first
+            aircraft_count = Counter(flight['tail_number'] for flight in skipped_flights)
             
             logging.warning("SUMMARY - Flights skipped by aircraft:")
-            for tail, count in sorted(aircraft_count.items()):
+            for tail, count in aircraft_count.most_common():
                 logging.warning(f"  {tail}: {count} flights skipped")
         
         if not unmatched_crew and not unmatched_airports and not unmatched_aircraft: